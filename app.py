@@ -2,23 +2,26 @@ import streamlit as st
 import numpy as np
 import pandas as pd
 import networkx as nx
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
+import matplotlib
 import plotly.graph_objects as go
-import time
+from numba import njit
 
 st.set_page_config(page_title="TaskPrism", layout="wide", page_icon="📊")
 
 
 # Helper functions
+@st.cache_data(show_spinner=False)
 def generate_color_map(n_colors):
     """Generate a color map with distinct colors for resources."""
-    cmap = plt.cm.get_cmap('tab20', n_colors)  # Use 'tab20' for distinct colors
-    return {i: mcolors.rgb2hex(cmap(i)[:3]) for i in range(n_colors)}
+    cmap = matplotlib.colormaps['tab20'].resampled(n_colors)  # Use 'tab20' for distinct colors
+    rgb = np.round(cmap(np.arange(n_colors))[:, :3] * 255).astype(np.uint32)
+    packed = (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+    return {i: f"#{value:06x}" for i, value in enumerate(packed.tolist())}
 
 
-def generate_graph(n_nodes, prob):
-    """Generate a random graph and its adjacency matrix."""
+@st.cache_data(show_spinner=False)
+def generate_graph(n_nodes, prob, seed=0):
+    """Generate a random graph and its sparse (CSR) adjacency matrix."""
     if n_nodes < 1:
         st.error("Number of nodes must be at least 1!")
         return None, None
@@ -26,26 +29,201 @@ def generate_graph(n_nodes, prob):
         st.error("Graph density must be between 0 and 1!")
         return None, None
 
-    G = nx.fast_gnp_random_graph(n_nodes, prob)
-    adj_matrix = nx.to_numpy_array(G, dtype=int)
+    G = nx.fast_gnp_random_graph(n_nodes, prob, seed=seed)
+    adj_matrix = nx.to_scipy_sparse_array(G, format="csr", dtype=np.int8)
     return G, adj_matrix
 
 
-def greedy_coloring(adj_matrix):
-    """Assign colors to nodes using a greedy graph coloring algorithm."""
-    n_nodes = len(adj_matrix)
-    colors = [-1] * n_nodes  # -1 means uncolored
-    for node in range(n_nodes):
-        # Finding colors of adjacent nodes
-        neighbor_colors = {colors[neighbor] for neighbor in np.where(adj_matrix[node] == 1)[0] if colors[neighbor] != -1}
+@njit(cache=True)
+def _greedy(indptr, indices, n):
+    """Greedy coloring over a CSR adjacency structure."""
+    colors = np.full(n, -1, np.int32)  # -1 means uncolored
+    # used[c] == v marks color c as taken by a neighbor of v, so it never needs resetting
+    used = np.full(n + 1, -1, np.int32)
+    for v in range(n):
+        for k in range(indptr[v], indptr[v + 1]):
+            c = colors[indices[k]]
+            if c >= 0:
+                used[c] = v
         # Assigning the lowest available color
-        color = 0
-        while color in neighbor_colors:
-            color += 1
-        colors[node] = color
+        c = 0
+        while used[c] == v:
+            c += 1
+        colors[v] = c
     return colors
 
 
+@njit(cache=True)
+def _greedy64(indptr, indices, n):
+    """Greedy coloring for graphs needing at most 64 colors, tracking neighbor colors in a uint64."""
+    colors = np.full(n, -1, np.int8)  # -1 means uncolored
+    for v in range(n):
+        mask = np.uint64(0)
+        for k in range(indptr[v], indptr[v + 1]):
+            c = colors[indices[k]]
+            if c >= 0:
+                mask |= np.uint64(1) << np.uint64(c)
+        # The lowest available color is the lowest clear bit of the mask;
+        # isolate it as a power of two and take its exponent
+        free = ~mask & (mask + np.uint64(1))
+        colors[v] = int(np.log2(np.float64(free)))
+    return colors
+
+
+@st.cache_data(show_spinner=False)
+def greedy_coloring(indptr, indices):
+    """Assign colors to nodes using a greedy graph coloring algorithm."""
+    n_nodes = len(indptr) - 1
+    # Greedy coloring never uses more than max degree + 1 colors
+    max_colors = int(np.diff(indptr).max(initial=0)) + 1
+    if max_colors <= 64:
+        return _greedy64(indptr, indices, n_nodes)
+    return _greedy(indptr, indices, n_nodes)
+
+
+@njit(cache=True)
+def _start_times(indptr, indices, order, durations):
+    """Earliest start of each task, visiting tasks in the given order."""
+    n = len(order)
+    rank = np.empty(n, np.int64)
+    for i in range(n):
+        rank[order[i]] = i
+    start = np.zeros(n, np.int32)
+    for v in order:
+        s = 0
+        for k in range(indptr[v], indptr[v + 1]):
+            u = indices[k]
+            # Only neighbors scheduled earlier are predecessors
+            if rank[u] < rank[v]:
+                s = max(s, start[u] + durations[u])
+        start[v] = s
+    return start
+
+
+def compute_start_times(indptr, indices, sorted_tasks, durations):
+    """Compute task start times, treating each dependency as pointing from the higher-priority task."""
+    order = np.asarray(sorted_tasks, dtype=np.int64)
+    return _start_times(indptr, indices, order, durations)
+
+
+@st.cache_data(show_spinner=False)
+def schedule_tasks(indptr, indices, priorities, durations):
+    """Order tasks by priority and compute their start times."""
+    sorted_tasks = np.argsort(np.asarray(priorities), kind="stable")
+    durations = np.asarray(durations, dtype=np.int16)
+    return sorted_tasks, compute_start_times(indptr, indices, sorted_tasks, durations)
+
+
+@st.cache_data(show_spinner=False)
+def layout_for(edges, n_nodes):
+    """Compute deterministic node positions for the graph with the given edge list."""
+    G = nx.Graph()
+    G.add_nodes_from(range(n_nodes))
+    G.add_edges_from(edges)
+    # The force-directed solver is quadratic per iteration; use the energy solver for large graphs
+    if n_nodes >= 500:
+        return nx.spring_layout(G, seed=42, method="energy")
+    return nx.spring_layout(G, seed=42)
+
+
+@st.cache_data(show_spinner=False)
+def network_figure(edges, n_nodes, node_colors):
+    """Build a Plotly figure of the dependency graph."""
+    pos = layout_for(edges, n_nodes)
+    # Edges go in a single line trace, with None breaking the line between segments
+    edge_x, edge_y = [], []
+    for u, v in edges:
+        edge_x += [pos[u][0], pos[v][0], None]
+        edge_y += [pos[u][1], pos[v][1], None]
+    nodes = range(n_nodes)
+    node_x = [pos[node][0] for node in nodes]
+    node_y = [pos[node][1] for node in nodes]
+
+    fig = go.Figure()
+    with fig.batch_update():
+        fig.add_traces([
+            go.Scatter(x=edge_x, y=edge_y, mode="lines", line=dict(color="gray"), hoverinfo="skip"),
+            go.Scattergl(
+                x=node_x,
+                y=node_y,
+                mode="markers+text",
+                marker=dict(color=node_colors, size=30),
+                text=[str(node) for node in nodes],
+                textfont=dict(color="white", size=12),
+                hoverinfo="text",
+            ),
+        ])
+        fig.update_layout(
+            showlegend=False,
+            xaxis=dict(visible=False),
+            yaxis=dict(visible=False),
+            height=600,
+        )
+    return fig
+
+
+def _gantt_segment_traces(names, starts, durations, resources, colors):
+    """Draw each task as a thick WebGL line segment, with one trace per resource color."""
+    names = np.asarray(names, dtype=object)
+    resources = np.asarray(resources, dtype=object)
+    colors = np.asarray(colors, dtype=object)
+    starts = np.asarray(starts)
+    finishes = starts + np.asarray(durations)
+
+    traces = []
+    for color in dict.fromkeys(colors):
+        tasks = np.flatnonzero(colors == color)
+        # Every task contributes its start point, its finish point and a None gap
+        x = np.full(3 * tasks.size, None, dtype=object)
+        y = np.full(3 * tasks.size, None, dtype=object)
+        x[0::3], x[1::3] = starts[tasks], finishes[tasks]
+        y[0::3], y[1::3] = names[tasks], names[tasks]
+        traces.append(go.Scattergl(
+            x=x,
+            y=y,
+            mode="lines",
+            line=dict(color=color, width=8),
+            customdata=np.repeat(resources[tasks], 3),
+            hovertemplate="%{y}: %{x}<br>%{customdata}<extra></extra>",
+        ))
+    return traces
+
+
+@st.cache_data(show_spinner=False)
+def gantt_figure(names, starts, durations, resources, colors):
+    """Build the Gantt chart of the task schedule, one bar per task."""
+    n_tasks = len(names)
+    if n_tasks <= 50:
+        # One trace for the whole schedule rather than one per task
+        traces = [go.Bar(
+            x=durations,
+            y=names,
+            base=starts,
+            orientation="h",
+            customdata=resources,
+            marker=dict(color=colors),
+            hovertemplate="%{y}: %{base}–%{x}<br>%{customdata}<extra></extra>",
+        )]
+    else:
+        # Bars get slow to render for long schedules, so switch to WebGL segments
+        traces = _gantt_segment_traces(names, starts, durations, resources, colors)
+
+    fig = go.Figure()
+    with fig.batch_update():
+        fig.add_traces(traces)
+        fig.update_layout(
+            title="Task Execution Schedule",
+            xaxis_title="Time (units)",
+            yaxis_title="Tasks",
+            showlegend=False,
+            xaxis=dict(showgrid=True),
+            # Keep rows in priority order; per-color WebGL traces would otherwise regroup them
+            yaxis=dict(categoryorder="array", categoryarray=list(names)),
+            height=max(600, 12 * n_tasks),
+        )
+    return fig
+
+
 # Main application code
 def main():
     # Centered Title
@@ -73,7 +251,7 @@ def main():
     # Sidebar Section
     st.sidebar.header("Task Allocation Parameters")
     n_nodes = st.sidebar.number_input(
-        "Number of tasks (nodes):", min_value=1, max_value=20, value=5, step=1
+        "Number of tasks (nodes):", min_value=1, max_value=100, value=5, step=1
     )
     prob = st.sidebar.slider(
         "Graph density (probability of dependency):", 0.0, 1.0, 0.5, 0.01
@@ -81,61 +259,67 @@ def main():
     n_colors = st.sidebar.number_input(
         "Number of resources (colors):", min_value=1, max_value=20, value=10, step=1
     )
+    seed = st.sidebar.number_input(
+        "Random seed:", min_value=0, value=0, step=1
+    )
 
     # Task details
     task_duration = {}
     task_deadlines = {}
     task_descriptions = {}
     task_priorities = {}
-    for node in range(n_nodes):
-        with st.sidebar.expander(f"Task {node + 1} Details"):
-            task_duration[node] = st.slider(f"Duration of task", 1, 10, 3, key=f"duration_{node}")
-            task_deadlines[node] = st.slider(f"Deadline", 1, 20, 10, key=f"deadline_{node}")
-            task_descriptions[node] = st.text_input(f"Description", f"Task {node + 1}", key=f"desc_{node}")
-            task_priorities[node] = st.slider(f"Priority (1 = highest)", 1, 10, 1, key=f"priority_{node}")
+    # Grouped in a form so editing a single task does not rerun the app until applied
+    with st.sidebar.form("task_params"):
+        for node in range(n_nodes):
+            with st.expander(f"Task {node + 1} Details"):
+                task_duration[node] = st.slider(f"Duration of task", 1, 10, 3, key=f"duration_{node}")
+                task_deadlines[node] = st.slider(f"Deadline", 1, 20, 10, key=f"deadline_{node}")
+                task_descriptions[node] = st.text_input(f"Description", f"Task {node + 1}", key=f"desc_{node}")
+                task_priorities[node] = st.slider(f"Priority (1 = highest)", 1, 10, 1, key=f"priority_{node}")
+        st.form_submit_button("Apply Task Details")
 
     # Instruction to click the button on the main page
-    st.sidebar.write("🔘 **After setting the parameters, click the 'Generate' button on the main page.**")
+    st.sidebar.write("🔘 **After setting the parameters, click 'Apply Task Details', then the 'Generate' button on the main page.**")
 
     # Generate results
     if st.button("Generate Graph and Allocate Tasks", key="generate", help="Click to generate the graph and allocate tasks"):
         with st.spinner("Generating the graph and allocating resources..."):
-            time.sleep(1)
-
             # Generate graph and adjacency matrix
-            G, adj_matrix = generate_graph(n_nodes, prob)
+            G, adj_matrix = generate_graph(n_nodes, prob, seed)
             if G is None or adj_matrix is None:
                 st.error("Failed to generate the graph. Please check the parameters.")
             else:
                 st.header("Generated Task Dependency Graph")
                 st.subheader("Adjacency Matrix")
-                st.dataframe(pd.DataFrame(adj_matrix, dtype=int))
+                # Only densify the adjacency matrix when it is small enough to preview
+                if n_nodes <= 20:
+                    st.dataframe(pd.DataFrame(adj_matrix.toarray(), dtype=int))
+                else:
+                    st.write(
+                        f"{n_nodes}×{n_nodes} adjacency matrix with {G.number_of_edges()} edges "
+                        f"(density {nx.density(G):.2f})"
+                    )
+                    st.download_button(
+                        label="Download Adjacency Matrix",
+                        data=pd.DataFrame(adj_matrix.toarray()).to_csv(index=False),
+                        file_name="adjacency_matrix.csv",
+                        mime="text/csv"
+                    )
+
+                # Neighbor lists in CSR form, shared by coloring and scheduling
+                indptr, indices = adj_matrix.indptr, adj_matrix.indices
 
                 # Perform graph coloring
                 try:
-                    assigned_colors = greedy_coloring(adj_matrix)
+                    assigned_colors = greedy_coloring(indptr, indices)
                     color_map = generate_color_map(n_colors)
                     node_colors = [color_map[assigned_colors[node] % n_colors] for node in range(n_nodes)]
 
-                    # Sort tasks by priority
-                    sorted_tasks = sorted(range(n_nodes), key=lambda x: task_priorities[x])
-
                     # Plot the graph
                     st.subheader("Task Dependency Visualization")
-                    fig, ax = plt.subplots(figsize=(12, 8))
-                    nx.draw(
-                        G,
-                        with_labels=True,
-                        node_color=node_colors,
-                        node_size=500,
-                        font_size=12,
-                        font_color="white",
-                        edge_color="gray",
-                        ax=ax,
-                        arrows=True,
-                        pos=nx.spring_layout(G)
-                    )
-                    st.pyplot(fig)
+                    edges = tuple(sorted(G.edges()))
+                    fig = network_figure(edges, n_nodes, tuple(node_colors))
+                    st.plotly_chart(fig)
 
                     # Resource Allocation
                     st.subheader("Resource Allocation")
@@ -146,56 +330,43 @@ def main():
                     )
                     st.dataframe(allocation_df)
 
-                    # Calculate task start times
-                    start_times = {task: 0 for task in range(n_nodes)}
-                    for task in sorted_tasks:
-                        dependent_tasks = np.where(adj_matrix[task] == 1)[0]
-                        if dependent_tasks.size > 0:
-                            start_times[task] = max(start_times[dep] + task_duration[dep] for dep in dependent_tasks)
+                    # Order tasks by priority and calculate their start times
+                    sorted_tasks, start_times = schedule_tasks(
+                        indptr, indices, tuple(task_priorities.values()), tuple(task_duration.values())
+                    )
 
-                    # Gantt Chart
+                    # Gantt Chart, with every column taken in priority order
                     st.subheader("Task Execution Timeline")
-                    gantt_data = []
-                    for task in sorted_tasks:
-                        gantt_data.append({
-                            "Task": task_descriptions[task],
-                            "Start": start_times[task],
-                            "Finish": start_times[task] + task_duration[task],
-                            "Resource": f"Resource {assigned_colors[task] + 1}",
-                        })
-
-                    fig = go.Figure()
-                    for task in sorted_tasks:
-                        fig.add_trace(go.Bar(
-                            x=[gantt_data[task]["Finish"] - gantt_data[task]["Start"]],
-                            y=[gantt_data[task]["Task"]],
-                            base=gantt_data[task]["Start"],
-                            orientation="h",
-                            name=gantt_data[task]["Resource"],
-                            marker=dict(color=color_map[assigned_colors[task]]),
-                            hoverinfo="x+y+name"
-                        ))
-
-                    fig.update_layout(
-                        title="Task Execution Schedule",
-                        xaxis_title="Time (units)",
-                        yaxis_title="Tasks",
-                        barmode="stack",
-                        showlegend=True,
-                        xaxis=dict(showgrid=True),
-                        height=600,
+                    durations = np.fromiter(task_duration.values(), dtype=np.int16, count=n_nodes)
+                    descriptions = np.array(list(task_descriptions.values()), dtype=object)
+                    gantt_starts = start_times[sorted_tasks]
+                    gantt_durations = durations[sorted_tasks]
+                    gantt_finishes = gantt_starts + gantt_durations
+                    gantt_data = pd.DataFrame({
+                        "Task": descriptions[sorted_tasks],
+                        "Start": gantt_starts,
+                        "Finish": gantt_finishes,
+                        "Resource": [f"Resource {color + 1}" for color in assigned_colors[sorted_tasks]],
+                    })
+
+                    fig = gantt_figure(
+                        tuple(gantt_data["Task"]),
+                        gantt_starts,
+                        gantt_durations,
+                        tuple(gantt_data["Resource"]),
+                        tuple(node_colors[task] for task in sorted_tasks),
                     )
-
                     st.plotly_chart(fig)
 
                     # Check for overdue tasks
-                    overdue_tasks = [f"Task {task + 1}" for task in sorted_tasks if start_times[task] + task_duration[task] > task_deadlines[task]]
-                    if overdue_tasks:
+                    deadlines = np.fromiter(task_deadlines.values(), dtype=np.int16, count=n_nodes)
+                    overdue_ids = sorted_tasks[gantt_finishes > deadlines[sorted_tasks]]
+                    if overdue_ids.size > 0:
+                        overdue_tasks = [f"Task {task + 1}" for task in overdue_ids]
                         st.error(f"The following tasks are overdue: {', '.join(overdue_tasks)}")
 
                     # Export to CSV
-                    export_data = pd.DataFrame(gantt_data)
-                    csv = export_data.to_csv(index=False)
+                    csv = gantt_data.to_csv(index=False)
                     st.download_button(
                         label="Download Task Execution Data",
                         data=csv,